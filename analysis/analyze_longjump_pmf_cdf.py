@@ -18,147 +18,171 @@ DB schema (from the C++ precompute):
     f1..f6: how many of each pip to freeze now (optimal)
 """
 import argparse, sqlite3, math
-from functools import lru_cache
-from collections import Counter
+from itertools import combinations_with_replacement
+
+import numpy as np
 
 RUNUP_PRE=0; RUNUP_POST=1; JUMP_PRE=2; JUMP_POST=3
 
+# Attempt score = sum of the (at most 5) jump dice, so PMFs are dense arrays over [0, 30].
+SCORE_MIN, SCORE_MAX = 0, 30
+XS = np.arange(SCORE_MIN, SCORE_MAX + 1)
+
+def pmf_point(x):
+    """Degenerate PMF with all mass at score x."""
+    a = np.zeros(SCORE_MAX - SCORE_MIN + 1)
+    a[x - SCORE_MIN] = 1.0
+    return a
+
 def score_from_counts(cnt):
-    return sum((i*cnt[i]) for i in range(1,7))
+    return sum((i*cnt[i-1]) for i in range(1,7))
 
 def outcomes_counts(n):
-    """List of (counts_dict, probability) for rolling n fair dice, using nondecreasing multiset + multinomial weights."""
-    if n == 0:
-        return [({1:0,2:0,3:0,4:0,5:0,6:0}, 1.0)]
+    """List of ((n1..n6), probability) for rolling n fair dice, using nondecreasing multiset + multinomial weights."""
     total = 6**n
+    FACT = [math.factorial(i) for i in range(n+1)]
     outs=[]
-    def rec(left, start_face, cur):
-        if left==0:
-            m = math.factorial(n)
-            for k in cur.values():
-                m //= math.factorial(k)
-            p = m / total
-            cnt = {i:cur.get(i,0) for i in range(1,7)}
-            outs.append((cnt, p))
-            return
-        for face in range(start_face, 7):
-            cur[face] = cur.get(face,0)+1
-            rec(left-1, face, cur)
-            cur[face] -= 1
-            if cur[face]==0: del cur[face]
-    rec(n,1,{})
+    for faces in combinations_with_replacement(range(1,7), n):
+        c = [0]*6
+        for face in faces:
+            c[face-1] += 1
+        m = FACT[n]
+        for k in c:
+            m //= FACT[k]
+        outs.append((tuple(c), m / total))
     return outs
 
 # cache outcomes
 _OUT = {n: outcomes_counts(n) for n in range(0,6)}
+_PROBS = {n: np.array([p for _, p in _OUT[n]]) for n in range(0,6)}
+
+def load_decisions(cur):
+    """Load the whole lj_post table into a dict keyed by (phase, sum_frozen, n1..n6).
+
+    Values are (f, frozen_sum, frozen_count) so the recursion never re-sums a decision.
+    """
+    rows = cur.execute(
+        """SELECT phase, sum_frozen, n1,n2,n3,n4,n5,n6, f1,f2,f3,f4,f5,f6 FROM lj_post"""
+    ).fetchall()
+    policy = {}
+    for row in rows:
+        f = row[8:]  # (f1..f6)
+        policy[row[:8]] = (f, sum(i*f[i-1] for i in range(1,7)), sum(f))
+    return policy
 
-def fetch_decision(cur, phase, sum_frozen, cnt):
-    row = cur.execute(
-        """SELECT f1,f2,f3,f4,f5,f6 FROM lj_post
-           WHERE phase=? AND (sum_frozen IS ? OR sum_frozen=?) AND
-                 n1=? AND n2=? AND n3=? AND n4=? AND n5=? AND n6=?""",
-        (phase,
-         None if phase==JUMP_POST else None,
-         None if phase==JUMP_POST else sum_frozen,
-         cnt[1],cnt[2],cnt[3],cnt[4],cnt[5],cnt[6])
-    ).fetchone()
+def fetch_decision(policy, phase, sum_frozen, cnt):
+    row = policy.get((phase, None if phase==JUMP_POST else sum_frozen) + cnt)
     if row is None:
         raise RuntimeError(f"No policy row for phase={phase}, s={sum_frozen}, cnt={cnt}")
-    f = {i: row[i-1] for i in range(1,7)}
-    return f
+    return row  # (f, frozen_sum, frozen_count)
 
-def pmf_add(a, b, w=1.0):
-    for x,p in b.items():
-        a[x] = a.get(x,0.0) + w*p
-    return a
+def decision_arrays(policy, phase, sum_frozen, n):
+    """(probs, frozen_sum, frozen_count) as arrays over the outcomes of rolling n dice."""
+    rows = [fetch_decision(policy, phase, sum_frozen, cnt) for cnt, _ in _OUT[n]]
+    add = np.array([r[1] for r in rows], dtype=np.int64)
+    fcnt = np.array([r[2] for r in rows], dtype=np.int64)
+    return _PROBS[n], add, fcnt
 
 def pmf_scale(a, s):
-    return {x: p*s for x,p in a.items()}
+    return a*s
 
 def pmf_mean_sd(pmf):
-    mu = sum(x*p for x,p in pmf.items())
-    var = sum((x-mu)**2*p for x,p in pmf.items())
+    mu = float((XS*pmf).sum())
+    var = float(((XS-mu)**2*pmf).sum())
     return mu, math.sqrt(max(0.0, var))
 
 def reconstruct_attempt_pmf(db_path, verbose=False):
     conn = sqlite3.connect(db_path)
+    # Read-only bulk load: memory-map the file and give the page cache 64 MiB.
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
     cur = conn.cursor()
+    policy = load_decisions(cur)
+    conn.close()
+
+    # Flat memo tables (None = not computed yet):
+    #   jump_memo[n_rem], runup_memo[n_rem*9 + s] for n_rem in 0..5, s in 0..8
+    jump_memo = [None]*6
+    runup_memo = [None]*(6*9)
 
-    @lru_cache(maxsize=None)
     def pmf_jump_pre(n_rem):
         # Base: no dice left to roll in jump -> score 0 with prob 1
         if n_rem <= 0:
-            return {0:1.0}
-        pmf = {}
-        for cnt, p in _OUT[n_rem]:
-            f = fetch_decision(cur, JUMP_POST, None, cnt)
-            add = sum(i*f[i] for i in range(1,7))
-            fcnt = sum(f[i] for i in range(1,7))
-            sub = pmf_jump_pre(n_rem - fcnt)
-            shifted = {x+add: q for x,q in sub.items()}
-            pmf_add(pmf, pmf_scale(shifted, p))
+            return pmf_point(0)
+        if jump_memo[n_rem] is not None:
+            return jump_memo[n_rem]
+        probs, add, fcnt = decision_arrays(policy, JUMP_POST, None, n_rem)
+        bad = (fcnt < 1) | (fcnt > n_rem)
+        if bad.any():
+            cnt = _OUT[n_rem][int(np.argmax(bad))][0]
+            raise RuntimeError(f"Invalid jump policy row (must freeze 1..{n_rem} dice): phase={JUMP_POST}, cnt={cnt}")
+        # W[c, a] = P(freeze c dice summing to a); each child pmf_jump_pre(n_rem-c)
+        # is shifted by a, i.e. convolved with W[c]
+        W = np.zeros((n_rem+1, XS.size))
+        np.add.at(W, (fcnt, add), probs)
+        pmf = np.zeros(XS.size)
+        for c in range(1, n_rem+1):
+            if W[c].any():
+                pmf += np.convolve(W[c], pmf_jump_pre(n_rem - c))[:XS.size]
+        jump_memo[n_rem] = pmf
         return pmf
 
-    @lru_cache(maxsize=None)
     def pmf_runup_pre(n_rem, s):
         # Base: if we've frozen all 5 dice in the run-up (n_rem==0),
         # jump uses k = 5 - n_rem dice (i.e., 5)
         if s > 8:
             # shouldn't be called, but treat as invalid attempt = 0
-            return {0:1.0}
+            return pmf_point(0)
+        key = n_rem*9 + s
+        if runup_memo[key] is not None:
+            return runup_memo[key]
         if n_rem == 0:
-            k = 5 - n_rem
-            return pmf_jump_pre(k)
+            runup_memo[key] = pmf_jump_pre(5)
+            return runup_memo[key]
 
         # STOP option -> jump with k = 5 - n_rem dice
         k = 5 - n_rem
         pmf_stop = pmf_jump_pre(k)
 
         # ROLL option -> expand outcomes of n_rem dice; at POST freeze per optimal policy
-        pmf_roll = {}
-        for cnt, p in _OUT[n_rem]:
-            f = fetch_decision(cur, RUNUP_POST, s, cnt)
-            add = sum(i*f[i] for i in range(1,7))
-            total_frozen = sum(f[i] for i in range(1,7))
-            if add <= 0 or s + add > 8 or total_frozen <= 0:
-                # No legal freeze -> invalid attempt for this outcome: contributes mass at 0
-                pmf_add(pmf_roll, {0: p})
-                continue
-            sub = pmf_runup_pre(n_rem - total_frozen, s + add)
-            pmf_add(pmf_roll, pmf_scale(sub, p))
+        probs, add, total_frozen = decision_arrays(policy, RUNUP_POST, s, n_rem)
+        # No legal freeze -> invalid attempt for this outcome: contributes mass at 0
+        foul = (add <= 0) | (s + add > 8) | (total_frozen <= 0)
+        children = np.array([
+            pmf_point(0) if bad else pmf_runup_pre(n_rem - tf, s + a)
+            for a, tf, bad in zip(add.tolist(), total_frozen.tolist(), foul.tolist())
+        ])
+        pmf_roll = probs @ children
 
         # Choose better branch by EV (tie → lower SD → prefer STOP)
         mu_stop, sd_stop = pmf_mean_sd(pmf_stop)
-        mu_roll, sd_roll = pmf_mean_sd(pmf_roll) if pmf_roll else (0.0, 0.0)
+        mu_roll, sd_roll = pmf_mean_sd(pmf_roll) if pmf_roll.any() else (0.0, 0.0)
         if (mu_roll > mu_stop) or (abs(mu_roll - mu_stop) < 1e-12 and sd_roll < sd_stop):
-            return pmf_roll
+            runup_memo[key] = pmf_roll
         else:
-            return pmf_stop
+            runup_memo[key] = pmf_stop
+        return runup_memo[key]
 
     pmf_attempt = pmf_runup_pre(5, 0)
     mu, sd = pmf_mean_sd(pmf_attempt)
     if verbose:
-        print(f"Attempt EV={mu:.6f}, SD={sd:.6f}, support size={len(pmf_attempt)}, total prob={sum(pmf_attempt.values()):.6f}")
-    conn.close()
+        print(f"Attempt EV={mu:.6f}, SD={sd:.6f}, support size={np.count_nonzero(pmf_attempt)}, total prob={pmf_attempt.sum():.6f}")
     return pmf_attempt, mu, sd
 
 def pmf_to_cdf(pmf):
-    xs = sorted(pmf.keys())
-    c=0.0; X=[]; F=[]
-    for x in xs:
-        c += pmf[x]; X.append(x); F.append(c)
-    if X and abs(F[-1]-1.0) < 1e-12: F[-1]=1.0
+    support = pmf > 0.0
+    X = XS[support]; F = np.cumsum(pmf)[support]
+    if X.size and abs(F[-1]-1.0) < 1e-12: F[-1]=1.0
     return X,F
 
 def cdf_power_to_pmf(xs, F, k):
-    """Given CDF of one attempt, compute PMF of max of k iid attempts."""
-    Fmax = [f**k for f in F]
-    pmf = {}
-    prev = 0.0
-    for x,fk in zip(xs, Fmax):
-        pmf[x] = fk - prev
-        prev = fk
-    return pmf
+    """Given CDF of one attempt, compute PMF of max of k iid attempts.
+
+    Returns (xs, pmf) with pmf aligned to xs.
+    """
+    Fmax = F**k
+    return xs, np.diff(Fmax, prepend=0.0)
 
 def dump_txt(path, xs, ys, header):
     with open(path, "w") as f:
@@ -181,56 +205,58 @@ def main():
 
     pmf_attempt, mu_a, sd_a = reconstruct_attempt_pmf(args.db, verbose=args.verbose)
 
-    # PMF/CDF plots (attempt)
-    import matplotlib.pyplot as plt
-    xs = sorted(pmf_attempt.keys())
-    ps = [pmf_attempt[x] for x in xs]
-    plt.figure()
-    plt.bar(xs, ps)
-    plt.xlabel("Attempt score")
-    plt.ylabel("Probability")
-    plt.title(f"Long Jump (attempt) PMF  EV={mu_a:.3f}, SD={sd_a:.3f}")
-    plt.tight_layout()
-    plt.savefig(args.attempt_pmf, dpi=150); print(f"Wrote {args.attempt_pmf}")
+    # PMF/CDF plots (attempt); matplotlib is only imported when a plot is requested
+    if args.attempt_pmf or args.attempt_cdf or args.final_pmf or args.final_cdf:
+        import matplotlib.pyplot as plt
+    support = pmf_attempt > 0.0
+    xs = XS[support]
+    ps = pmf_attempt[support]
+    if args.attempt_pmf:
+        plt.figure()
+        plt.bar(xs, ps)
+        plt.xlabel("Attempt score")
+        plt.ylabel("Probability")
+        plt.title(f"Long Jump (attempt) PMF  EV={mu_a:.3f}, SD={sd_a:.3f}")
+        plt.tight_layout()
+        plt.savefig(args.attempt_pmf, dpi=150); print(f"Wrote {args.attempt_pmf}")
 
     Xa, Fa = pmf_to_cdf(pmf_attempt)
-    plt.figure()
-    plt.plot(Xa, Fa, drawstyle="steps-post")
-    plt.xlabel("Attempt score")
-    plt.ylabel("Cumulative probability")
-    plt.title("Long Jump (attempt) CDF")
-    plt.tight_layout()
-    plt.savefig(args.attempt_cdf, dpi=150); print(f"Wrote {args.attempt_cdf}")
+    if args.attempt_cdf:
+        fig, ax = plt.subplots()
+        ax.step(Xa, Fa, where="post", rasterized=True)
+        ax.set_xlabel("Attempt score")
+        ax.set_ylabel("Cumulative probability")
+        ax.set_title("Long Jump (attempt) CDF")
+        fig.tight_layout()
+        fig.savefig(args.attempt_cdf, dpi=150); print(f"Wrote {args.attempt_cdf}")
     if args.attempt_cdf_txt:
         dump_txt(args.attempt_cdf_txt, Xa, Fa, "# score\tcdf")
         print(f"Wrote {args.attempt_cdf_txt}")
 
     # Final event = best of k attempts
-    F_final_pmf = cdf_power_to_pmf(Xa, Fa, args.k)
-    Xf = sorted(F_final_pmf.keys())
-    Pf = [F_final_pmf[x] for x in Xf]
-    muf = sum(x*p for x,p in F_final_pmf.items())
-    sdf = math.sqrt(max(0.0, sum((x-muf)**2*p for x,p in F_final_pmf.items())))
-
-    plt.figure()
-    plt.bar(Xf, Pf)
-    plt.xlabel("Final (best of k) score")
-    plt.ylabel("Probability")
-    plt.title(f"Long Jump (best of {args.k}) PMF  EV={muf:.3f}, SD={sdf:.3f}")
-    plt.tight_layout()
-    plt.savefig(args.final_pmf, dpi=150); print(f"Wrote {args.final_pmf}")
+    Xf, Pf = cdf_power_to_pmf(Xa, Fa, args.k)
+    muf = float((Xf*Pf).sum())
+    sdf = math.sqrt(max(0.0, float(((Xf-muf)**2*Pf).sum())))
+
+    if args.final_pmf:
+        plt.figure()
+        plt.bar(Xf, Pf)
+        plt.xlabel("Final (best of k) score")
+        plt.ylabel("Probability")
+        plt.title(f"Long Jump (best of {args.k}) PMF  EV={muf:.3f}, SD={sdf:.3f}")
+        plt.tight_layout()
+        plt.savefig(args.final_pmf, dpi=150); print(f"Wrote {args.final_pmf}")
 
     # CDF for final
-    acc=0.0; Fc=[]
-    for x in Xf:
-        acc += F_final_pmf[x]; Fc.append(acc)
-    plt.figure()
-    plt.plot(Xf, Fc, drawstyle="steps-post")
-    plt.xlabel("Final (best of k) score")
-    plt.ylabel("Cumulative probability")
-    plt.title(f"Long Jump (best of {args.k}) CDF")
-    plt.tight_layout()
-    plt.savefig(args.final_cdf, dpi=150); print(f"Wrote {args.final_cdf}")
+    Fc = np.cumsum(Pf)
+    if args.final_cdf:
+        fig, ax = plt.subplots()
+        ax.step(Xf, Fc, where="post", rasterized=True)
+        ax.set_xlabel("Final (best of k) score")
+        ax.set_ylabel("Cumulative probability")
+        ax.set_title(f"Long Jump (best of {args.k}) CDF")
+        fig.tight_layout()
+        fig.savefig(args.final_cdf, dpi=150); print(f"Wrote {args.final_cdf}")
     if args.final_cdf_txt:
         dump_txt(args.final_cdf_txt, Xf, Fc, "# score\tcdf")
         print(f"Wrote {args.final_cdf_txt}")
@@ -0,0 +1,206 @@
+"""
+Shared 100 Metres PMF reconstruction for the analysis scripts (analyze_100m_pmf.py,
+analyze_100m_pmf_cdf.py), using the precomputed SQLite policy DB produced by the C++ precompute step.
+
+Notes:
+- We reconstruct the PMF by recursion:
+    pmf(state) = pmf after taking the policy's best action at that state,
+    expanding one roll (over all 4-dice outcomes) when the action involves a roll.
+- Terminal when stage=2 and the best action is FREEZE → degenerate distribution at set1 + score(current).
+- We work entirely with non-decreasing (sorted) 4-die tuples and multinomial weights to cut work by ~10x.
+- The recursion runs bottom-up in a Numba kernel over int-encoded states and dense score arrays.
+"""
+
+import os
+import sqlite3
+import math
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from numba import njit, prange
+
+FACT = [1, 1, 2, 6, 24]  # k! for k = 0..4
+
+def sorted_4dice_outcomes_with_weights():
+    """Yield (d1<=d2<=d3<=d4, probability) for fair 6-sided dice."""
+    sides = range(1,7)
+    total = 6**4
+    # Enumerate nondecreasing quadruples and compute multiplicity
+    outs = []
+    for d1 in sides:
+        for d2 in range(d1,7):
+            for d3 in range(d2,7):
+                for d4 in range(d3,7):
+                    tup = (d1,d2,d3,d4)
+                    c = [0]*7
+                    c[d1] += 1; c[d2] += 1; c[d3] += 1; c[d4] += 1
+                    mult = 24 // (FACT[c[1]]*FACT[c[2]]*FACT[c[3]]*FACT[c[4]]*FACT[c[5]]*FACT[c[6]])  # 4! / prod(k!)
+                    p = mult / total
+                    outs.append((tup, p))
+    return outs
+
+FOUR_OUTS = sorted_4dice_outcomes_with_weights()
+
+# Array form of FOUR_OUTS for the JIT kernel; states refer to a roll by its outcome index.
+PROBS = np.asarray([p for (_, p) in FOUR_OUTS])
+OUT_INDEX = {t: i for i, (t, _) in enumerate(FOUR_OUTS)}
+
+# Score ranges: each set scores in [-24, 20], the final total in [-48, 40].
+SET1_MIN, SET1_MAX = -24, 20
+SCORE_MIN, SCORE_MAX = -48, 40
+NSCORES = SCORE_MAX - SCORE_MIN + 1
+XS = np.arange(SCORE_MIN, SCORE_MAX + 1)
+
+# Integer encoding of the `best` column for the JIT kernel (-1 = missing row).
+FREEZE, REROLL = 0, 1
+
+def score_set(dice):
+    return sum(v if v < 6 else -6 for v in dice)
+
+# Set score of each outcome, looked up by outcome index in the kernel.
+SCORES = np.asarray([score_set(t) for (t, _) in FOUR_OUTS], dtype=np.int32)
+
+def load_policy(cur):
+    """Load the whole states100m table into a dict keyed by (stage, rerolls, d1, d2, d3, d4, set1_score)."""
+    rows = cur.execute(
+        """SELECT stage, rerolls, d1, d2, d3, d4, set1_score,
+                  best, ev_freeze, sd_freeze, ev_reroll, sd_reroll
+             FROM states100m"""
+    ).fetchall()
+    return {row[:7]: row[7:] for row in rows}
+
+def policy_arrays(policy):
+    """Encode the policy dict as an int8 array best[stage, rerolls, outcome_idx, set1 - SET1_MIN]."""
+    best = np.full((3, 6, len(FOUR_OUTS), SET1_MAX - SET1_MIN + 1), -1, dtype=np.int8)
+    for (stage, rerolls, d1, d2, d3, d4, set1), row in policy.items():
+        j = 0 if set1 is None else set1 - SET1_MIN
+        best[stage, rerolls, OUT_INDEX[(d1, d2, d3, d4)], j] = FREEZE if row[0] == "freeze" else REROLL
+    # Every state the kernel visits must be present.
+    for stage, rerolls, o, j in np.argwhere(best[1:3] < 0):
+        if stage == 0 and j > 0:
+            continue  # stage 1 only uses set1_idx 0
+        set1 = None if stage == 0 else j + SET1_MIN
+        raise RuntimeError(f"Policy row not found for state: stage={stage+1}, rerolls={rerolls}, dice={FOUR_OUTS[o][0]}, set1={set1}")
+    # The kernel assumes a reroll always has one left to spend.
+    for stage, o, j in np.argwhere(best[1:3, 0] == REROLL):
+        set1 = None if stage == 0 else j + SET1_MIN
+        raise RuntimeError(f"Policy says reroll with no rerolls left: stage={stage+1}, dice={FOUR_OUTS[o][0]}, set1={set1}")
+    return best
+
+@njit(cache=True, parallel=True)
+def _pmf_start(best, scores, probs):
+    """PMF of the final score (indexed by score - SCORE_MIN) under the encoded policy.
+
+    Fills memo tables bottom-up in rerolls, so every child PMF is ready before its parent:
+      pmf2[rerolls, outcome, set1 - SET1_MIN, :]  for stage 2 states,
+      pmf1[rerolls, outcome, :]                   for stage 1 states.
+    States within one rerolls level only read lower levels, so each level is filled in parallel.
+    """
+    n_out = scores.shape[0]
+    n_set1 = SET1_MAX - SET1_MIN + 1
+    pmf2 = np.zeros((6, n_out, n_set1, NSCORES))
+    pmf1 = np.zeros((6, n_out, NSCORES))
+
+    for r in range(6):
+        # stage 2: freeze is terminal, reroll redraws 4 dice with one fewer reroll
+        for j in prange(n_set1):
+            for o in range(n_out):
+                if best[2, r, o, j] == FREEZE:
+                    pmf2[r, o, j, j + SET1_MIN + scores[o] - SCORE_MIN] = 1.0
+                else:
+                    out = pmf2[r, o, j]
+                    for c in range(n_out):
+                        sub = pmf2[r-1, c, j]
+                        p = probs[c]
+                        for x in range(NSCORES):
+                            out[x] += p * sub[x]
+
+        # stage 1: freeze rolls the initial set 2, reroll redraws set 1
+        for o in prange(n_out):
+            out = pmf1[r, o]
+            if best[1, r, o, 0] == FREEZE:
+                j = scores[o] - SET1_MIN
+                for c in range(n_out):
+                    sub = pmf2[r, c, j]
+                    p = probs[c]
+                    for x in range(NSCORES):
+                        out[x] += p * sub[x]
+            else:
+                for c in range(n_out):
+                    sub = pmf1[r-1, c]
+                    p = probs[c]
+                    for x in range(NSCORES):
+                        out[x] += p * sub[x]
+
+    # Starting distribution: average over initial roll of set 1
+    start = np.zeros(NSCORES)
+    for c in range(n_out):
+        sub = pmf1[5, c]
+        p = probs[c]
+        for x in range(NSCORES):
+            start[x] += p * sub[x]
+    return start
+
+def pmf_mean_sd(pmf):
+    """Mean and SD of a dense PMF indexed by score - SCORE_MIN."""
+    mu = float((XS*pmf).sum())
+    var = float(((XS-mu)**2 * pmf).sum())
+    return mu, math.sqrt(max(0.0, var))
+
+def load_policy_arrays(db_path):
+    """Encoded policy for db_path, cached as <db>.npz next to the DB and rebuilt when the DB is newer."""
+    db_path = Path(db_path)
+    npz_path = db_path.with_suffix(".npz")
+    shape = (3, 6, len(FOUR_OUTS), SET1_MAX - SET1_MIN + 1)
+    if npz_path.exists() and npz_path.stat().st_mtime >= db_path.stat().st_mtime:
+        try:
+            with np.load(npz_path) as data:
+                best = data["best"]
+            if best.shape == shape and best.dtype == np.int8:
+                return best
+        except Exception:
+            pass  # unreadable / half-written / foreign cache: rebuild from SQLite
+
+    conn = sqlite3.connect(db_path)
+    # Read-only bulk load: memory-map the file and give the page cache 64 MiB.
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    cur = conn.cursor()
+    policy = load_policy(cur)
+    conn.close()
+
+    best = policy_arrays(policy)
+    # Write to a temp file and rename it into place, so concurrent readers never see a partial archive.
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=npz_path.parent, prefix=npz_path.name, suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            np.savez(f, best=best)
+        os.replace(tmp_path, npz_path)
+    except OSError:
+        # cache is optional (e.g. read-only solvers/ dir)
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return best
+
+def reconstruct_pmf(db_path, verbose=False):
+    start_pmf = _pmf_start(load_policy_arrays(db_path), SCORES, PROBS)
+
+    mu, sd = pmf_mean_sd(start_pmf)
+    if verbose:
+        print(f"Final-score EV = {mu:.6f}, SD = {sd:.6f}, support size = {np.count_nonzero(start_pmf)}")
+        # sanity: probabilities sum to 1
+        print(f"Total probability = {start_pmf.sum():.6f}")
+
+    return start_pmf, mu, sd
+
+def pmf_to_cdf(pmf):
+    """CDF of a dense PMF, evaluated at the scores in its support."""
+    support = pmf > 0.0
+    cdf = np.cumsum(pmf)[support]
+    # fix any rounding wobble
+    if abs(cdf[-1] - 1.0) < 1e-12:
+        cdf[-1] = 1.0
+    return XS[support], cdf
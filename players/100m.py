@@ -7,16 +7,26 @@ DB_PATH = Path(__file__).resolve().parents[1] / "solvers" / "100m_policy.db"
 def score_set(d):  # for printing only
     return sum(v if v < 6 else -6 for v in d)
 
-def lookup(cur, stage, rerolls, dice, set1_score):
+def roll4(rng):
+    """Roll 4 dice and return them sorted."""
+    r = rng.randrange
+    d = [r(1,7), r(1,7), r(1,7), r(1,7)]
+    d.sort()
+    return tuple(d)
+
+def load_policy(cur):
+    """Load the whole states100m table into a dict keyed by (stage, rerolls, d1, d2, d3, d4, set1_score)."""
+    rows = cur.execute(
+        """SELECT stage, rerolls, d1, d2, d3, d4, set1_score,
+                  ev_freeze, sd_freeze, ev_reroll, sd_reroll, best
+             FROM states100m"""
+    ).fetchall()
+    return {row[:7]: row[7:] for row in rows}
+
+def lookup(policy, stage, rerolls, dice, set1_score):
     d = tuple(sorted(dice))
-    row = cur.execute(
-        """SELECT ev_freeze, sd_freeze, ev_reroll, sd_reroll, best
-             FROM states100m
-            WHERE stage=? AND rerolls=? AND d1=? AND d2=? AND d3=? AND d4=? AND
-                  (set1_score IS ? OR set1_score = ?)""",
-        (stage, rerolls, d[0], d[1], d[2], d[3],
-         None if stage==1 else None, None if stage==1 else set1_score)
-    ).fetchone()
+    row = policy.get((stage, rerolls, d[0], d[1], d[2], d[3],
+                      None if stage==1 else set1_score))
     if row is None:
         raise RuntimeError(f"State not found: stage={stage}, rerolls={rerolls}, dice={d}, set1={set1_score}")
     evF, sdF, evR, sdR, best = row
@@ -35,10 +45,10 @@ def fmt_acts(best, acts):
 def interactive(play_auto=False, seed=None):
     rng = random.Random(seed)
     with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
+        policy = load_policy(conn.cursor())
         rerolls = 5
         # stage 1 initial roll
-        dice = tuple(sorted(rng.choices([1,2,3,4,5,6], k=4)))
+        dice = roll4(rng)
         stage = 1
         set1 = None
 
@@ -48,10 +58,10 @@ def interactive(play_auto=False, seed=None):
         while True:
             if stage == 1:
                 print(f"[SET 1] Dice: {dice} | score-if-freeze={score_set(dice):2d} | rerolls={rerolls}")
-                best, acts = lookup(cur, 1, rerolls, dice, None)
+                best, acts = lookup(policy, 1, rerolls, dice, None)
             else:
                 print(f"[SET 2] Dice: {dice} | score-if-freeze={score_set(dice):2d} | rerolls={rerolls} | set1={set1}")
-                best, acts = lookup(cur, 2, rerolls, dice, set1)
+                best, acts = lookup(policy, 2, rerolls, dice, set1)
 
             print(fmt_acts(best, acts))
 
@@ -69,7 +79,7 @@ def interactive(play_auto=False, seed=None):
             if choice == "freeze":
                 if stage == 1:
                     set1 = score_set(dice)
-                    dice = tuple(sorted(rng.choices([1,2,3,4,5,6], k=4)))
+                    dice = roll4(rng)
                     stage = 2
                 else:
                     total = set1 + score_set(dice)
@@ -80,7 +90,7 @@ def interactive(play_auto=False, seed=None):
                     print("No rerolls left; forced freeze.")
                     if stage == 1:
                         set1 = score_set(dice)
-                        dice = tuple(sorted(rng.choices([1,2,3,4,5,6], k=4)))
+                        dice = roll4(rng)
                         stage = 2
                     else:
                         total = set1 + score_set(dice)
@@ -88,7 +98,7 @@ def interactive(play_auto=False, seed=None):
                         return
                 else:
                     rerolls -= 1
-                    dice = tuple(sorted(rng.choices([1,2,3,4,5,6], k=4)))
+                    dice = roll4(rng)
 
 if __name__ == "__main__":
     interactive(play_auto=False)
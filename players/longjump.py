@@ -21,37 +21,48 @@ import random
 RUNUP_PRE=0; RUNUP_POST=1; JUMP_PRE=2; JUMP_POST=3
 
 def roll_dice(n):
-    return [random.randint(1, 6) for _ in range(n)]
+    r = random.randrange
+    return [r(1, 7) for _ in range(n)]
 
 def counts_from_dice(dice):
-    cnt = {i: 0 for i in range(1, 7)}
+    """Pip counts (n1..n6) of a roll."""
+    c = [0]*6
     for d in dice:
-        cnt[d] += 1
-    return cnt
+        c[d-1] += 1
+    return tuple(c)
 
-def fetch_decision(cur, phase, sum_frozen, cnt):
-    row = cur.execute(
-        """SELECT f1,f2,f3,f4,f5,f6 FROM lj_post
-           WHERE phase=? AND (sum_frozen IS ? OR sum_frozen=?) AND
-                 n1=? AND n2=? AND n3=? AND n4=? AND n5=? AND n6=?""",
-        (phase,
-         None if phase == JUMP_POST else None,
-         None if phase == JUMP_POST else sum_frozen,
-         cnt[1], cnt[2], cnt[3], cnt[4], cnt[5], cnt[6])
-    ).fetchone()
+# Separate statements for NULL / non-NULL sum_frozen so SQLite can seek on the key
+# (an `IS ? OR = ?` predicate cannot use the index).
+SQL_DECISION_NULL = """SELECT f1,f2,f3,f4,f5,f6 FROM lj_post
+                        WHERE phase=? AND sum_frozen IS NULL AND
+                              n1=? AND n2=? AND n3=? AND n4=? AND n5=? AND n6=?"""
+SQL_DECISION_VAL = """SELECT f1,f2,f3,f4,f5,f6 FROM lj_post
+                       WHERE phase=? AND sum_frozen=? AND
+                             n1=? AND n2=? AND n3=? AND n4=? AND n5=? AND n6=?"""
+
+def fetch_decision(cur, phase, sum_frozen, c):
+    """Optimal freeze counts (f1..f6) for pip counts c = (n1..n6)."""
+    s = None if phase == JUMP_POST else sum_frozen
+    if s is None:
+        row = cur.execute(SQL_DECISION_NULL, (phase,) + c).fetchone()
+    else:
+        row = cur.execute(SQL_DECISION_VAL, (phase, s) + c).fetchone()
     if row is None:
-        raise RuntimeError(f"No policy for phase={phase}, s={sum_frozen}, cnt={cnt}")
-    return {i: row[i-1] for i in range(1, 7)}
+        raise RuntimeError(f"No policy for phase={phase}, s={sum_frozen}, cnt={c}")
+    return row
+
+def fmt_freeze(f):
+    """Faces to freeze for freeze counts f = (f1..f6), in the same form the prompt accepts."""
+    return " ".join(str(face) for face in range(1, 7) for _ in range(f[face-1])) or "(none)"
 
 def freeze_dice(dice, freeze_faces, freeze_counts):
-    """Freeze according to chosen counts per face."""
+    """Freeze according to chosen counts per face (f1..f6 list; consumed in place)."""
     frozen = []
     remaining = []
-    counts_needed = freeze_counts.copy()
     for d in dice:
-        if counts_needed.get(d, 0) > 0:
+        if freeze_counts[d-1] > 0:
             frozen.append(d)
-            counts_needed[d] -= 1
+            freeze_counts[d-1] -= 1
         else:
             remaining.append(d)
     return frozen, remaining
@@ -64,10 +75,10 @@ def run_longjump(cur, show_hint=False):
     while True:
         dice = roll_dice(remaining)
         print(f"Run-up roll: {dice}  (sum frozen={sum_runup})")
-        cnt = counts_from_dice(dice)
+        c = counts_from_dice(dice)
         if show_hint:
-            hint = fetch_decision(cur, RUNUP_POST, sum_runup, cnt)
-            print(f"[HINT] Freeze: {hint}")
+            hint = fetch_decision(cur, RUNUP_POST, sum_runup, c)
+            print(f"[HINT] Freeze: {fmt_freeze(hint)}")
         choice = input("Freeze dice (faces) or 'stop': ").strip().lower()
         if choice == 'stop':
             break
@@ -79,10 +90,10 @@ def run_longjump(cur, show_hint=False):
             except ValueError:
                 print("Invalid input.")
                 continue
-        fc = {i: 0 for i in range(1, 7)}
+        fc = [0]*6
         for v in to_freeze:
-            if v in fc:
-                fc[v] += 1
+            if 1 <= v <= 6:
+                fc[v-1] += 1
         frozen, remaining_dice = freeze_dice(dice, to_freeze, fc)
         frozen_runup.extend(frozen)
         sum_runup += sum(frozen)
@@ -100,10 +111,10 @@ def run_longjump(cur, show_hint=False):
     while remaining > 0:
         dice = roll_dice(remaining)
         print(f"Jump roll: {dice}")
-        cnt = counts_from_dice(dice)
+        c = counts_from_dice(dice)
         if show_hint:
-            hint = fetch_decision(cur, JUMP_POST, None, cnt)
-            print(f"[HINT] Freeze: {hint}")
+            hint = fetch_decision(cur, JUMP_POST, None, c)
+            print(f"[HINT] Freeze: {fmt_freeze(hint)}")
         choice = input("Freeze dice (faces) or 'all': ").strip().lower()
         if choice == 'all':
             to_freeze = dice.copy()
@@ -113,10 +124,10 @@ def run_longjump(cur, show_hint=False):
             except ValueError:
                 print("Invalid input.")
                 continue
-        fc = {i: 0 for i in range(1, 7)}
+        fc = [0]*6
         for v in to_freeze:
-            if v in fc:
-                fc[v] += 1
+            if 1 <= v <= 6:
+                fc[v-1] += 1
         frozen, remaining_dice = freeze_dice(dice, to_freeze, fc)
         jump_score += sum(frozen)
         remaining = len(remaining_dice)
@@ -131,6 +142,15 @@ def main():
     ap.add_argument("--hint", action="store_true", help="Show engine's optimal freeze each step")
     args = ap.parse_args()
     conn = sqlite3.connect(args.db)
+    # Covering index for fetch_decision: key columns + the selected f1..f6.
+    # Best effort: a read-only DB still works, just without the index.
+    try:
+        conn.executescript(
+            "CREATE INDEX IF NOT EXISTS idx_ljpost ON lj_post"
+            "(phase,sum_frozen,n1,n2,n3,n4,n5,n6,f1,f2,f3,f4,f5,f6);"
+        )
+    except sqlite3.OperationalError:
+        pass
     cur = conn.cursor()
     print("=== Long Jump ===")
     scores = []
@@ -23,7 +23,7 @@ pip install --upgrade pip
 
 # 4. Install required packages
 echo "Installing required packages..."
-pip install matplotlib
+pip install matplotlib numpy numba
 
 echo
 echo "✅ Environment setup complete."